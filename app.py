@@ -1,18 +1,73 @@
 from flask import Flask, jsonify, request, render_template
+from flask.json.provider import DefaultJSONProvider
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 import mysql.connector
 from decouple import config
 from datetime import datetime
 import requests
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o encoder padrão do Flask
+    orjson = None
+
 # Importa funções das APIs uMov.me
 from api_umov_entrega import fetch_entrega
 from api_umov_montagem import fetch_montagem
 
+# Profiling sob demanda (desativado por padrão)
+from profiling import registrar_profiling
+
 app = Flask(__name__)
 
 # 🔐 Chave secreta do Flask 
 app.secret_key = config("SECRET_KEY", default="chave-padrao")
 
+# 🔬 Profiling por requisição (X-Profile-Token ou PROFILE_SAMPLE_RATE)
+registrar_profiling(app)
+
+# ============================================================
+# ⚡ Serialização JSON
+# ============================================================
+class OrjsonProvider(DefaultJSONProvider):
+    """Provider JSON do Flask usando orjson, com a mesma saída do provider padrão"""
+
+    # Datas passam pelo default do Flask (http_date) e as chaves saem ordenadas
+    OPCOES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.OPCOES).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+# Respostas sem indentação mesmo em debug
+app.json.compact = True
+
+# ============================================================
+# 📄 Paginação de /api/pedidos
+# ============================================================
+PAGINA_PADRAO = 20
+PAGINA_MAXIMA = 100
+CURSOR_VALIDADE = 15 * 60  # segundos
+
+# Colunas de cada linha retornada em /api/pedidos (ordem das tuplas)
+COLUNAS_PEDIDOS = ["loja", "pedido", "data", "valor", "situacao_pedido", "data_situacao"]
+
+# Valores de SECRET_KEY que não servem para assinar nada (padrão do código e do .env.example)
+CHAVES_INSEGURAS = {"", "chave-padrao", "your-secret-key-here"}
+
+# O cursor é assinado: prova que o captcha já foi validado para este CPF.
+# Sem SECRET_KEY própria o cursor poderia ser forjado, então a paginação fica
+# desligada e /api/pedidos volta a exigir captcha e devolver todos os pedidos.
+if app.secret_key in CHAVES_INSEGURAS:
+    print("[AVISO] SECRET_KEY ausente ou padrão — paginação de /api/pedidos desativada")
+    cursor_serializer = None
+else:
+    cursor_serializer = URLSafeTimedSerializer(app.secret_key, salt="pedidos-cursor")
+
 # ============================================================
 # 🔗 Conexão com o banco
 # ============================================================
@@ -52,42 +107,74 @@ def index():
 def pedidos():
     cpf = request.args.get("cpf")
     captcha_token = request.args.get("captcha")
+    cursor_token = request.args.get("cursor")
+    limite = min(max(request.args.get("limite", PAGINA_PADRAO, type=int), 1), PAGINA_MAXIMA)
 
     if not cpf:
         return jsonify({"error": "CPF não informado"}), 400
 
-    if not captcha_token:
-        return jsonify({"error": "Captcha ausente"}), 403
-
-    # 🔹 Verifica o captcha com o Google
-    secret_key = config("RECAPTCHA_SECRET_KEY")
-    verify_url = "https://www.google.com/recaptcha/api/siteverify"
-    payload = {"secret": secret_key, "response": captcha_token}
-    captcha_resp = requests.post(verify_url, data=payload).json()
+    posicao = None
+    if cursor_token:
+        if cursor_serializer is None:
+            return jsonify({"error": "Cursor inválido ou expirado"}), 403
 
-    if not captcha_resp.get("success"):
-        return jsonify({"error": "Falha na verificação do CAPTCHA"}), 403
+        # 🔹 Próximas páginas: o cursor assinado substitui o captcha
+        try:
+            posicao = cursor_serializer.loads(cursor_token, max_age=CURSOR_VALIDADE)
+        except BadSignature:
+            return jsonify({"error": "Cursor inválido ou expirado"}), 403
+        if posicao.get("cpf") != cpf:
+            return jsonify({"error": "Cursor inválido ou expirado"}), 403
+    else:
+        if not captcha_token:
+            return jsonify({"error": "Captcha ausente"}), 403
+
+        # 🔹 Verifica o captcha com o Google
+        secret_key = config("RECAPTCHA_SECRET_KEY")
+        verify_url = "https://www.google.com/recaptcha/api/siteverify"
+        payload = {"secret": secret_key, "response": captcha_token}
+        captcha_resp = requests.post(verify_url, data=payload).json()
+
+        if not captcha_resp.get("success"):
+            return jsonify({"error": "Falha na verificação do CAPTCHA"}), 403
 
     conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
 
-    # 🔹 1) Busca pedidos do cliente
+    # 🔹 1) Busca uma página de pedidos do cliente (mais recentes primeiro)
     query_pedidos = """
-        SELECT *
+        SELECT loja, pedido, transacao, data, valor
         FROM starmoveis_custom.vw_pedidos
         WHERE cpf = %s
-        ORDER BY pedido DESC
     """
-    cursor.execute(query_pedidos, (cpf,))
+    params = [cpf]
+    if posicao:
+        query_pedidos += " AND (pedido < %s OR (pedido = %s AND loja < %s))"
+        params += [posicao["pedido"], posicao["pedido"], posicao["loja"]]
+    query_pedidos += " ORDER BY pedido DESC, loja DESC"
+    if cursor_serializer is not None:
+        # Busca um registro a mais só para saber se existe próxima página
+        query_pedidos += " LIMIT %s"
+        params.append(limite + 1)
+
+    cursor.execute(query_pedidos, params)
     pedidos = cursor.fetchall()
 
+    proximo_cursor = None
+    if cursor_serializer is not None and len(pedidos) > limite:
+        pedidos = pedidos[:limite]
+        ultima_loja, ultimo_pedido = pedidos[-1][0], pedidos[-1][1]
+        proximo_cursor = cursor_serializer.dumps({"cpf": cpf, "loja": ultima_loja, "pedido": ultimo_pedido})
+
     if not pedidos:
         cursor.close()
         conn.close()
-        return jsonify([])
+        return jsonify({"colunas": COLUNAS_PEDIDOS, "pedidos": [], "proximo_cursor": None})
 
-    # 🔹 2) Última situação do banco
-    query_situacoes = """
+    # 🔹 2) Última situação do banco (somente transações desta página)
+    transacoes = [p[2] for p in pedidos]
+    marcadores = ", ".join(["%s"] * len(transacoes))
+    query_situacoes = f"""
         SELECT 
             s.xano AS transacao,
             s.situacao,
@@ -97,70 +184,37 @@ def pedidos():
         INNER JOIN (
             SELECT xano, MAX(date * 1000000 + time) AS ultima
             FROM starmoveis_custom.vw_situacoes_pedidos
+            WHERE xano IN ({marcadores})
             GROUP BY xano
         ) ult
             ON s.xano = ult.xano 
             AND (s.date * 1000000 + s.time) = ult.ultima
-        JOIN starmoveis_custom.vw_pedidos p
-            ON p.transacao = s.xano
-        WHERE p.cpf = %s
     """
-    cursor.execute(query_situacoes, (cpf,))
+    cursor.execute(query_situacoes, transacoes)
     situacoes = cursor.fetchall()
 
     situacao_por_transacao = {}
-    for s in situacoes:
+    for transacao, situacao, data, hora in situacoes:
         try:
-            total_segundos = s["time"]
+            total_segundos = hora
             horas = total_segundos // 3600
             resto = total_segundos % 3600
             minutos = resto // 60
             segundos = resto % 60
-            data_formatada = f"{datetime.strptime(str(s['date']), '%Y%m%d').strftime('%d/%m/%Y')} {horas:02d}:{minutos:02d}:{segundos:02d}"
+            data_formatada = f"{datetime.strptime(str(data), '%Y%m%d').strftime('%d/%m/%Y')} {horas:02d}:{minutos:02d}:{segundos:02d}"
         except Exception:
             data_formatada = "—"
 
-        situacao_por_transacao[s["transacao"]] = {
-            "situacao": s["situacao"],
-            "data_hora": data_formatada
-        }
-
-    # 🔹 3) Itens do pedido
-    query_itens = """
-        SELECT 
-            pp.loja,
-            pp.pedido,
-            pp.item,
-            pp.produto,
-            pp.quantidade,
-            pp.preco
-        FROM starmoveis_custom.vw_produtos_pedidos pp
-        JOIN starmoveis_custom.vw_pedidos p
-            ON pp.loja = p.loja AND pp.pedido = p.pedido
-        WHERE p.cpf = %s
-        ORDER BY pp.pedido
-    """
-    cursor.execute(query_itens, (cpf,))
-    itens = cursor.fetchall()
-
-    itens_por_pedido = {}
-    for item in itens:
-        chave = f"{item['loja']}-{item['pedido']}"
-        itens_por_pedido.setdefault(chave, []).append({
-            "item": item["produto"],
-            "quantidade": item["quantidade"],
-            "preco": item["preco"]
-        })
+        situacao_por_transacao[transacao] = (situacao, data_formatada)
 
-    # 🔹 4) Monta resultado final com integrações uMov
-    for p in pedidos:
-        ultima_etapa = situacao_por_transacao.get(p["transacao"], {"situacao": "—", "data_hora": "—"})
-        situacao_final = ultima_etapa["situacao"]
-        data_final = ultima_etapa["data_hora"]
+    # 🔹 3) Monta as linhas (ver COLUNAS_PEDIDOS) com integrações uMov
+    linhas = []
+    for loja, pedido, transacao, data, valor in pedidos:
+        situacao_final, data_final = situacao_por_transacao.get(transacao, ("—", "—"))
 
         try:
             # 🟢 API Entrega
-            umov_entrega = fetch_entrega(p["transacao"])
+            umov_entrega = fetch_entrega(transacao)
             if umov_entrega:
                 def parse_datetime(dt):
                     try:
@@ -183,7 +237,7 @@ def pedidos():
                         data_final = formatar_data_api(ultima.get("finish_time"))
 
             # 🟡 API Montagem — corrigida
-            umov_montagem = fetch_montagem(p["transacao"])
+            umov_montagem = fetch_montagem(transacao)
             if umov_montagem:
                 def parse_datetime(dt):
                     try:
@@ -217,21 +271,34 @@ def pedidos():
                             data_final = formatar_data_api(atividade.get("finish_time"))
 
         except Exception as e:
-            print(f"[ERRO uMov.me - Pedido {p['transacao']}] {e}")
+            print(f"[ERRO uMov.me - Pedido {transacao}] {e}")
 
         # 📅 Formata data principal
-        data_str = str(p["data"])
+        data_str = str(data)
         if len(data_str) == 8:
-            p["data"] = datetime.strptime(data_str, "%Y%m%d").strftime("%d/%m/%Y")
+            data = datetime.strptime(data_str, "%Y%m%d").strftime("%d/%m/%Y")
 
-        p["situacao_pedido"] = situacao_final
-        p["data_situacao"] = data_final
-        chave = f"{p['loja']}-{p['pedido']}"
-        p["itens"] = itens_por_pedido.get(chave, [])
+        linhas.append((loja, pedido, data, valor, situacao_final, data_final))
 
     cursor.close()
     conn.close()
-    return jsonify(pedidos)
+    return jsonify({"colunas": COLUNAS_PEDIDOS, "pedidos": linhas, "proximo_cursor": proximo_cursor})
+
+# ============================================================
+# 🧾 Itens de um pedido (carregados só ao abrir os detalhes)
+# ============================================================
+def buscar_itens(cursor, loja, pedido):
+    """Itens do pedido (produto, quantidade, preco); o chamador já validou o CPF"""
+    cursor.execute(
+        """
+        SELECT produto, quantidade, preco
+        FROM starmoveis_custom.vw_produtos_pedidos
+        WHERE loja = %s AND pedido = %s
+        ORDER BY item
+        """,
+        (loja, pedido)
+    )
+    return cursor.fetchall()
 
 # ============================================================
 # 🧾 API /api/detalhes — retorna pedido + itens + histórico
@@ -249,7 +316,11 @@ def detalhes():
     cursor = conn.cursor(dictionary=True)
 
     cursor.execute(
-        "SELECT * FROM starmoveis_custom.vw_pedidos WHERE cpf=%s AND loja=%s AND pedido=%s",
+        """
+        SELECT loja, pedido, transacao, cliente, data, valor
+        FROM starmoveis_custom.vw_pedidos
+        WHERE cpf=%s AND loja=%s AND pedido=%s
+        """,
         (cpf, loja, pedido)
     )
     pedido_info = cursor.fetchone()
@@ -258,11 +329,7 @@ def detalhes():
         conn.close()
         return jsonify({"error": "Pedido não encontrado"}), 404
 
-    cursor.execute(
-        "SELECT produto, quantidade, preco FROM starmoveis_custom.vw_produtos_pedidos WHERE loja=%s AND pedido=%s",
-        (loja, pedido)
-    )
-    pedido_info["itens"] = cursor.fetchall()
+    pedido_info["itens"] = buscar_itens(cursor, loja, pedido)
 
     cursor.execute(
         """
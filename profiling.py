@@ -0,0 +1,153 @@
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+
+from flask import g, request
+from decouple import config
+
+# ============================================================
+# ⚙️ Configuração
+# ============================================================
+# PROFILE_TOKEN       → habilita o header X-Profile-Token (autenticado)
+# PROFILE_SAMPLE_RATE → fração de requisições perfiladas (0.0 a 1.0)
+# PROFILE_DIR         → pasta onde os arquivos .prof são salvos
+# PROFILE_MAX_FILES   → máximo de arquivos mantidos (os mais antigos são apagados)
+PROFILE_TOKEN = config("PROFILE_TOKEN", default="")
+PROFILE_SAMPLE_RATE = config("PROFILE_SAMPLE_RATE", cast=float, default=0.0)
+PROFILE_DIR = config("PROFILE_DIR", default="profiles")
+PROFILE_MAX_FILES = config("PROFILE_MAX_FILES", cast=int, default=200)
+
+# X-Request-ID do cliente só é ecoado se for um identificador simples
+_REQUEST_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Arquivos que identificam cada etapa no Server-Timing
+_SEP = os.sep
+_PASTA_MYSQL = f"{_SEP}mysql{_SEP}"
+_PREFIXO_UMOV = "api_umov_"
+
+
+# ============================================================
+# 🧭 Funções auxiliares
+# ============================================================
+def _categoria(arquivo):
+    """Classifica o arquivo de uma função do cProfile em 'db', 'umov' ou None"""
+    if _PASTA_MYSQL in arquivo:
+        return "db"
+    if os.path.basename(arquivo).startswith(_PREFIXO_UMOV):
+        return "umov"
+    return None
+
+
+def _tempos_por_categoria(stats):
+    """Soma o tempo acumulado das chamadas que entram em cada categoria"""
+    tempos = {"db": 0.0, "umov": 0.0}
+    for (arquivo, _, _), (_, _, _, _, chamadores) in stats.stats.items():
+        categoria = _categoria(arquivo)
+        if not categoria:
+            continue
+        # Conta só a "porta de entrada" para não somar chamadas internas duas vezes
+        for (arquivo_chamador, _, _), (_, _, _, acumulado) in chamadores.items():
+            if _categoria(arquivo_chamador) != categoria:
+                tempos[categoria] += acumulado
+    return tempos
+
+
+def _podar_perfis():
+    """Apaga os arquivos .prof mais antigos além de PROFILE_MAX_FILES"""
+    arquivos = [
+        os.path.join(PROFILE_DIR, nome)
+        for nome in os.listdir(PROFILE_DIR)
+        if nome.endswith(".prof")
+    ]
+    if len(arquivos) <= PROFILE_MAX_FILES:
+        return
+    arquivos.sort(key=os.path.getmtime)
+    for caminho in arquivos[:len(arquivos) - PROFILE_MAX_FILES]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def _deve_perfilar():
+    # Só as rotas da API interessam; estáticos e a página inicial ficam de fora
+    if not request.path.startswith("/api/"):
+        return False
+
+    token = request.headers.get("X-Profile-Token")
+    # Compara bytes: compare_digest com str não-ASCII lança TypeError
+    if token and PROFILE_TOKEN and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+# ============================================================
+# 🔬 Registro dos hooks no Flask
+# ============================================================
+def registrar_profiling(app):
+    """Ativa o profiling por requisição; sem configuração nenhum hook é registrado"""
+    if not PROFILE_TOKEN and PROFILE_SAMPLE_RATE <= 0:
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    @app.before_request
+    def iniciar_profiling():
+        if not _deve_perfilar():
+            return
+
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro profiler já está ativo (ex.: requisição concorrente)
+            return
+
+        g.perfil = perfil
+        g.perfil_inicio = time.perf_counter()
+        # Nome do arquivo sempre gerado no servidor; nunca vem do cliente
+        g.perfil_id = uuid.uuid4().hex
+
+    @app.after_request
+    def finalizar_profiling(response):
+        perfil = g.pop("perfil", None)
+        if perfil is None:
+            return response
+
+        perfil.disable()
+        total = time.perf_counter() - g.perfil_inicio
+
+        # Falhas no profiling nunca devem derrubar a resposta
+        try:
+            # 💾 Salva o perfil (compatível com snakeviz, flameprof, gprof2dot...)
+            perfil.dump_stats(os.path.join(PROFILE_DIR, f"{g.perfil_id}.prof"))
+            _podar_perfis()
+
+            tempos = _tempos_por_categoria(pstats.Stats(perfil))
+            processamento = max(total - tempos["db"] - tempos["umov"], 0.0)
+
+            response.headers["X-Profile-ID"] = g.perfil_id
+            request_id = request.headers.get("X-Request-ID", "")
+            if _REQUEST_ID_VALIDO.match(request_id):
+                response.headers["X-Request-ID"] = request_id
+            response.headers["Server-Timing"] = ", ".join([
+                f'db;desc="MySQL";dur={tempos["db"] * 1000:.1f}',
+                f'umov;desc="uMov.me";dur={tempos["umov"] * 1000:.1f}',
+                f'proc;desc="Processamento";dur={processamento * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        except Exception as e:
+            print(f"[ERRO profiling - {g.perfil_id}] {e}")
+        return response
+
+    @app.teardown_request
+    def descartar_profiling(exc):
+        # Garante que o profiler seja desligado se a view lançar exceção
+        perfil = g.pop("perfil", None)
+        if perfil is not None:
+            perfil.disable()
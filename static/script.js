@@ -1,3 +1,22 @@
+// ============================================================
+// 📄 Paginação de pedidos
+// ============================================================
+// Converte a resposta compacta ({colunas, pedidos: [[...]]}) em objetos
+function linhasParaObjetos(colunas, linhas) {
+  return linhas.map(linha => Object.fromEntries(colunas.map((c, i) => [c, linha[i]])));
+}
+
+function botaoCarregarMais(cpf, proximoCursor) {
+  if (!proximoCursor) return "";
+  return `
+    <div class="text-center mb-4" id="carregar-mais-container">
+      <button id="carregar-mais" class="btn btn-outline-secondary btn-sm"
+              data-cpf="${cpf}" data-cursor="${proximoCursor}">
+        Carregar mais pedidos
+      </button>
+    </div>`;
+}
+
 // ============================================================
 // 🟢 Consulta de pedidos por CPF
 // ============================================================
@@ -43,9 +62,12 @@ document.getElementById("consultar").addEventListener("click", async () => {
 
   try {
     const response = await fetch(`/api/pedidos?cpf=${cpf}&captcha=${captchaToken}`);
-    const data = await response.json();
+    const resposta = await response.json();
+    const data = Array.isArray(resposta.pedidos)
+      ? linhasParaObjetos(resposta.colunas, resposta.pedidos)
+      : [];
 
-    if (!Array.isArray(data) || data.length === 0) {
+    if (data.length === 0) {
       resultado.innerHTML = `
         <div class="text-center mt-4">
           <p class="text-secondary fw-semibold">Nenhum pedido encontrado.</p>
@@ -56,10 +78,61 @@ document.getElementById("consultar").addEventListener("click", async () => {
     // Cabeçalho
     let html = `
       <div class="mt-2 mx-auto" style="max-width: 650px;">
-        <h5 class="fw-bold pb-2 mb-4 border-bottom">Pedidos Encontrados (${data.length})</h5>
-    `;
+        <h5 class="fw-bold pb-2 mb-4 border-bottom">Pedidos Encontrados</h5>
+        <div id="lista-pedidos">${renderizarPedidos(data, cpf)}</div>
+        ${botaoCarregarMais(cpf, resposta.proximo_cursor)}
+      </div>`;
+    resultado.innerHTML = html;
+
+  } catch (error) {
+    console.error(error);
+    resultado.innerHTML = `
+      <div class="text-center mt-4">
+        <p class="text-danger fw-semibold">Erro ao buscar pedidos. Tente novamente.</p>
+      </div>`;
+  } finally {
+      // DESBLOQUEIA o botão no final (sempre)
+      botao.disabled = false;
+      botao.classList.remove("disabled", "opacity-75");
+      botao.innerHTML = textoOriginal;
+  }
+});
+
+// ============================================================
+// ➕ Próximas páginas de pedidos
+// ============================================================
+document.addEventListener("click", async event => {
+  const botao = event.target.closest("#carregar-mais");
+  if (!botao) return;
+
+  const cpf = botao.getAttribute("data-cpf");
+  const cursor = botao.getAttribute("data-cursor");
+  const container = document.getElementById("carregar-mais-container");
+
+  botao.disabled = true;
+  botao.innerHTML = "Carregando...";
+
+  try {
+    const response = await fetch(`/api/pedidos?cpf=${cpf}&cursor=${encodeURIComponent(cursor)}`);
+    const resposta = await response.json();
+    if (!response.ok || resposta.error) throw new Error(resposta.error);
+
+    const data = linhasParaObjetos(resposta.colunas, resposta.pedidos);
+    document.getElementById("lista-pedidos").insertAdjacentHTML("beforeend", renderizarPedidos(data, cpf));
+    container.outerHTML = botaoCarregarMais(cpf, resposta.proximo_cursor);
+
+  } catch (error) {
+    console.error(error);
+    container.innerHTML = `<p class="text-danger fw-semibold">Erro ao carregar mais pedidos. Refaça a consulta.</p>`;
+  }
+});
+
+// ============================================================
+// 🃏 Cards de pedidos
+// ============================================================
+function renderizarPedidos(data, cpf) {
+    let html = "";
 
-    // Cards de pedidos
     data.forEach(pedido => {
       let badgeClass = "bg-secondary";
       const situacao = pedido.situacao_pedido?.toLowerCase() || "";
@@ -134,22 +207,8 @@ document.getElementById("consultar").addEventListener("click", async () => {
       `;
     });
 
-    html += `</div>`;
-    resultado.innerHTML = html;
-
-  } catch (error) {
-    console.error(error);
-    resultado.innerHTML = `
-      <div class="text-center mt-4">
-        <p class="text-danger fw-semibold">Erro ao buscar pedidos. Tente novamente.</p>
-      </div>`;
-  } finally {
-      // DESBLOQUEIA o botão no final (sempre)
-      botao.disabled = false;
-      botao.classList.remove("disabled", "opacity-75");
-      botao.innerHTML = textoOriginal;
-  }
-});
+    return html;
+}
 
 // ============================================================
 // 🧾 Formatação de valores monetários